@@ -6,14 +6,114 @@ A graphical installer with Calamares-style UI
 
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk, Gdk, GLib, Pango, GdkPixbuf
+from gi.repository import Gtk, Gdk, GLib, Gio, Pango, GdkPixbuf
 import subprocess
 import os
 import sys
 import threading
 import re
+import datetime
+import json
+import time
+import queue
+import stat
+import fcntl
+import select
+import ctypes
+import traceback
+import errno
+from collections import deque
+
+# libc for mount(2)/umount2(2) without forking mount(8)
+libc = ctypes.CDLL("libc.so.6", use_errno=True)
+libc.mount.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_ulong, ctypes.c_char_p]
+libc.unshare.argtypes = [ctypes.c_int]
+libc.umount2.argtypes = [ctypes.c_char_p, ctypes.c_int]
+
+# Octal escapes (e.g. \040 for a space) used in /proc/mounts and mountinfo paths
+_MOUNT_ESCAPE_RE = re.compile(r"\\([0-7]{3})")
+
+def unescape_mount_path(path):
+    """Decode a mount point as printed in /proc/mounts or /proc/self/mountinfo"""
+    return _MOUNT_ESCAPE_RE.sub(lambda m: chr(int(m.group(1), 8)), path)
+
+# Sidebar steps (label, icon name), one per page
+SIDEBAR_STEPS = (
+    ("Start", "system-run-symbolic"),
+    ("Welcome", "dialog-information-symbolic"),
+    ("Select Disk", "drive-harddisk-symbolic"),
+    ("User Setup", "system-users-symbolic"),
+    ("Summary", "emblem-documents-symbolic"),
+    ("Installation", "system-software-install-symbolic"),
+    ("Finish", "emblem-default-symbolic"),
+)
+
+# Markup for the summary page, filled in by update_summary
+SUMMARY_TEMPLATE = """<b>Installation Target:</b> {disk}
+
+<b>User Configuration:</b>
+  • Username: {username}
+  • Computer Name: {hostname}
+  • Password: {bullets}
+
+<b>Image:</b> {image}
+"""
+
+# Installer stylesheet, installed on the default screen by create_sidebar
+CSS_BYTES = b"""
+.sidebar {
+    background: linear-gradient(to bottom, #2c3e50, #34495e);
+    color: white;
+    padding: 20px;
+}
+.sidebar-item {
+    padding: 15px;
+    margin: 5px 0;
+    border-radius: 5px;
+    color: #bdc3c7;
+}
+.sidebar-item-active {
+    background-color: rgba(52, 152, 219, 0.3);
+    color: white;
+    font-weight: bold;
+}
+.sidebar-item-completed {
+    color: #27ae60;
+}
+.content-area {
+    background-color: #f5f6fa;
+}
+.content-overlay {
+    background-color: rgba(255, 255, 255, 0.92);
+    border-radius: 10px;
+}
+.page-box {
+    background-color: rgba(255, 255, 255, 0.85);
+    border-radius: 8px;
+    padding: 20px;
+}
+.page-box-lg {
+    margin: 50px;
+}
+.page-box-md {
+    margin: 30px 40px;
+}
+"""
 
 class InstallerWindow(Gtk.Window):
+    _css_installed = False
+    BLKRRPART = 0x125F  # _IO(0x12, 95) from linux/fs.h
+    CLONE_NEWNS = 0x00020000
+    MS_REC = 0x4000
+    MS_SLAVE = 1 << 19
+    MNT_DETACH = 2
+    PAGE_NAMES = ["choice", "welcome", "disk", "user", "summary", "install", "finish"]
+    _PROGRESS_RE = re.compile(r"\((\d+(?:\.\d+)?)/100%\)")
+    _USERNAME_RE = re.compile(r"^[a-z_][a-z0-9_-]{0,31}$")
+    _HOSTNAME_RE = re.compile(r"^[a-zA-Z0-9-]{1,63}$")
+    _USERNAME_CHARS_RE = re.compile(r"^[a-z0-9_-]+$")
+    _HOSTNAME_CHARS_RE = re.compile(r"^[a-zA-Z0-9-]+$")
+    
     def __init__(self):
         super().__init__(title="Nanas OS Installer")
         
@@ -21,7 +121,17 @@ class InstallerWindow(Gtk.Window):
         self.desktop_dir = "/root/Desktop"
         os.makedirs(self.desktop_dir, exist_ok=True)
         self.log_file = os.path.join(self.desktop_dir, "installer-debug.log")
-        self.log_messages = []
+        try:
+            self._log_fp = open(self.log_file, "a", buffering=1)  # Line-buffered
+        except Exception as e:
+            print(f"Failed to open log file: {e}")
+            self._log_fp = None
+        self.log_messages = deque(maxlen=2048)  # In-memory tail of the log
+        self._log_q = queue.Queue()
+        if self._log_fp is not None:
+            thread = threading.Thread(target=self.log_flusher)
+            thread.daemon = True
+            thread.start()
         self.log("Installer started")
         
         # Make window fullscreen and always on top
@@ -38,14 +148,27 @@ class InstallerWindow(Gtk.Window):
         
         # Installation state
         self.qcow2_image = None
+        self._image_basename = None
         self.selected_disk = None
+        self._part_prefix = ""  # "p" for disks whose partitions are named like nvme0n1p1
         self.username = ""
         self.hostname = ""
         self.password = ""
+        self._bullets = ""  # Masked password for the summary page
         self.current_page = 0
+        self._qemu_img_help = None
+        self._status_lock = threading.Lock()
+        self._pending_status = None
+        self._status_scheduled = False
+        self.image_search_done = False
+        self.image_info = None
+        
+        # Disk model lives outside the disk page so the listing can start early
+        self.disk_store = Gtk.ListStore(str, str, str, str)  # device, size, model, full_path
+        self._disk_generation = 0
         
-        # Find qcow2 image
-        self.find_qcow2_image()
+        # Decode and scale the logo once; pages wrap the cached pixbufs
+        self.load_logo()
         
         # Create main layout
         main_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=0)
@@ -112,30 +235,73 @@ class InstallerWindow(Gtk.Window):
         # Add main_vbox to main_box (after sidebar)
         main_box.pack_start(main_vbox, True, True, 0)
         
-        # Create pages
-        self.create_choice_page()
-        self.create_welcome_page()
-        self.create_disk_selection_page()
-        self.create_user_config_page()
-        self.create_summary_page()
-        self.create_installation_page()
-        self.create_finish_page()
+        # Pages are built the first time show_page needs them
+        self._page_builders = {
+            0: self.create_choice_page,
+            1: self.create_welcome_page,
+            2: self.create_disk_selection_page,
+            3: self.create_user_config_page,
+            4: self.create_summary_page,
+            5: self.create_installation_page,
+            6: self.create_finish_page,
+        }
+        self._built_pages = set()
+        self.ensure_page(0)
+        
+        # Find qcow2 image and list disks in the background so the window can appear immediately
+        self.start_image_search()
+        self.refresh_disks()
         
-        self.connect("destroy", Gtk.main_quit)
+        self.connect("destroy", self.on_destroy)
         
     def log(self, message):
         """Log message to both console and file"""
-        timestamp = subprocess.run(["date", "+%Y-%m-%d %H:%M:%S"], capture_output=True, text=True).stdout.strip()
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_entry = f"[{timestamp}] {message}"
         self.log_messages.append(log_entry)
         print(log_entry)
         
-        # Write to file
+        # Hand off to the flusher thread
+        if self._log_fp is not None:
+            self._log_q.put(log_entry + "\n")
+    
+    def log_flusher(self):
+        """Write queued log lines to the log file in batches"""
+        while True:
+            batch = [self._log_q.get()]
+            time.sleep(0.05)  # Let a burst of messages accumulate
+            while len(batch) < 64:
+                try:
+                    batch.append(self._log_q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._log_fp.write("".join(batch))
+            except Exception as e:
+                print(f"Failed to write log: {e}")
+            for _ in batch:
+                self._log_q.task_done()
+    
+    def flush_log(self):
+        """Wait until every queued log line has been written"""
+        if self._log_fp is not None:
+            self._log_q.join()
+    
+    def close_log(self):
+        """Flush and close the log file; later messages only go to the console"""
+        if self._log_fp is None:
+            return
+        self.flush_log()
+        log_fp, self._log_fp = self._log_fp, None
         try:
-            with open(self.log_file, "a") as f:
-                f.write(log_entry + "\n")
+            log_fp.close()
         except Exception as e:
-            print(f"Failed to write log: {e}")
+            print(f"Failed to close log: {e}")
+    
+    def on_destroy(self, widget):
+        """Close the log file and quit the main loop"""
+        self.close_log()
+        Gtk.main_quit()
     
     def on_cancel(self, widget):
         """Handle cancel button click"""
@@ -156,86 +322,126 @@ class InstallerWindow(Gtk.Window):
         
         if response == Gtk.ResponseType.YES:
             self.log("User confirmed exit")
+            self.exit_installer()
+    
+    def exit_installer(self):
+        """Save the final log off the main loop, then quit"""
+        self.set_sensitive(False)
+        
+        def exit_thread():
             self.save_final_log()
-            Gtk.main_quit()
+            GLib.idle_add(self.quit_installer)
+        
+        thread = threading.Thread(target=exit_thread)
+        thread.daemon = True
+        thread.start()
+    
+    def quit_installer(self):
+        self.close_log()
+        Gtk.main_quit()
+        return False
     
     def save_final_log(self):
         """Save final log with system information"""
         try:
-            with open(self.log_file, "a") as f:
-                f.write("\n=== SYSTEM INFORMATION ===\n")
-                
-                # Mount info
-                result = subprocess.run(["mount"], capture_output=True, text=True)
-                f.write("\nMounts:\n" + result.stdout + "\n")
-                
-                # Block devices
-                result = subprocess.run(["lsblk", "-o", "NAME,SIZE,TYPE,MOUNTPOINT,FSTYPE"], capture_output=True, text=True)
-                f.write("\nBlock Devices:\n" + result.stdout + "\n")
-                
-                # Directory listing
-                for path in ["/cdrom", "/cdrom/images"]:
-                    if os.path.isdir(path):
-                        result = subprocess.run(["ls", "-la", path], capture_output=True, text=True)
-                        f.write(f"\nContents of {path}:\n" + result.stdout + "\n")
-                
-                f.write("\n=== END OF LOG ===\n")
+            # Make sure queued messages land before the system information
+            self.flush_log()
+            f = self._log_fp
+            f.write("\n=== SYSTEM INFORMATION ===\n")
+            
+            # Mount info
+            with open("/proc/mounts") as mf:
+                mounts = mf.read()
+            f.write("\nMounts:\n" + mounts + "\n")
+            
+            # Block devices
+            f.write("\nBlock Devices:\n" + self.describe_block_devices(mounts) + "\n")
+            
+            # Directory listing
+            for path in ["/cdrom", "/cdrom/images"]:
+                if os.path.isdir(path):
+                    with os.scandir(path) as it:
+                        listing = "".join(f"{e.name}\t{e.stat(follow_symlinks=False).st_size}\n" for e in it)
+                    f.write(f"\nContents of {path}:\n" + listing + "\n")
+            
+            f.write("\n=== END OF LOG ===\n")
+            f.flush()
         except Exception as e:
             print(f"Failed to save final log: {e}")
     
+    def describe_block_devices(self, mounts):
+        """Build an lsblk-style table from /sys/block and the given /proc/mounts text"""
+        mounted = {}
+        for line in mounts.splitlines():
+            fields = line.split()
+            if len(fields) >= 3 and fields[0].startswith("/dev/"):
+                mounted.setdefault(os.path.basename(fields[0]), []).append((fields[1], fields[2]))
+        
+        def read_sysfs(path):
+            try:
+                with open(path) as sf:
+                    return sf.read().strip()
+            except OSError:
+                return ""
+        
+        def describe(name, sys_path, dev_type, model):
+            size = read_sysfs(os.path.join(sys_path, "size"))
+            size = str(int(size) * 512) if size.isdigit() else "?"
+            mountpoint = " ".join(mp for mp, _ in mounted.get(name, []))
+            fstype = " ".join(fs for _, fs in mounted.get(name, []))
+            return f"{name}\t{size}\t{dev_type}\t{mountpoint}\t{fstype}\t{model}\n"
+        
+        lines = ["NAME\tSIZE\tTYPE\tMOUNTPOINT\tFSTYPE\tMODEL\n"]
+        for name in sorted(os.listdir("/sys/block")):
+            sys_path = os.path.join("/sys/block", name)
+            model = read_sysfs(os.path.join(sys_path, "device", "model"))
+            dev_type = "loop" if name.startswith("loop") else "rom" if name.startswith("sr") else "disk"
+            lines.append(describe(name, sys_path, dev_type, model))
+            for part in sorted(os.listdir(sys_path)):
+                part_path = os.path.join(sys_path, part)
+                if os.path.exists(os.path.join(part_path, "partition")):
+                    lines.append(describe(part, part_path, "part", ""))
+        return "".join(lines)
+    
+    def load_logo(self):
+        self._logo_path = "/usr/share/nanas/nos-logo.png"
+        self._logo_ok = os.path.exists(self._logo_path)  # The file can't change while we run
+        self._logo_512 = None
+        self._logo_240 = None
+        if self._logo_ok:
+            try:
+                self._logo_512 = GdkPixbuf.Pixbuf.new_from_file_at_scale(self._logo_path, 512, 512, True)
+                scale = 240 / max(self._logo_512.get_width(), self._logo_512.get_height())
+                self._logo_240 = self._logo_512.scale_simple(
+                    max(1, round(self._logo_512.get_width() * scale)),
+                    max(1, round(self._logo_512.get_height() * scale)),
+                    GdkPixbuf.InterpType.BILINEAR
+                )
+            except Exception as e:
+                self.log(f"Failed to load logo: {e}")
+                self._logo_ok = False
+                self._logo_512 = None
+                self._logo_240 = None
+    
     def create_sidebar(self):
         sidebar = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
         sidebar.set_size_request(250, -1)
         sidebar.get_style_context().add_class("sidebar")
         
-        # Apply custom CSS
-        css = b"""
-        .sidebar {
-            background: linear-gradient(to bottom, #2c3e50, #34495e);
-            color: white;
-            padding: 20px;
-        }
-        .sidebar-item {
-            padding: 15px;
-            margin: 5px 0;
-            border-radius: 5px;
-            color: #bdc3c7;
-        }
-        .sidebar-item-active {
-            background-color: rgba(52, 152, 219, 0.3);
-            color: white;
-            font-weight: bold;
-        }
-        .sidebar-item-completed {
-            color: #27ae60;
-        }
-        .content-area {
-            background-color: #f5f6fa;
-        }
-        .content-overlay {
-            background-color: rgba(255, 255, 255, 0.92);
-            border-radius: 10px;
-        }
-        .page-box {
-            background-color: rgba(255, 255, 255, 0.85);
-            border-radius: 8px;
-            padding: 20px;
-        }
-        """
-        
-        css_provider = Gtk.CssProvider()
-        css_provider.load_from_data(css)
-        Gtk.StyleContext.add_provider_for_screen(
-            Gdk.Screen.get_default(),
-            css_provider,
-            Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
-        )
+        # Apply custom CSS once per screen
+        if not InstallerWindow._css_installed:
+            css_provider = Gtk.CssProvider()
+            css_provider.load_from_data(CSS_BYTES)
+            Gtk.StyleContext.add_provider_for_screen(
+                Gdk.Screen.get_default(),
+                css_provider,
+                Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
+            )
+            InstallerWindow._css_installed = True
         
         # Logo/Title
-        logo_path = "/usr/share/nanas/nos-logo.png"
-        if os.path.exists(logo_path):
-            pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(logo_path, 240, 240, True)
-            logo = Gtk.Image.new_from_pixbuf(pixbuf)
+        if self._logo_ok:
+            logo = Gtk.Image.new_from_pixbuf(self._logo_240)
         else:
             logo = Gtk.Image.new_from_icon_name("distributor-logo", Gtk.IconSize.DIALOG)
             logo.set_pixel_size(240)
@@ -249,17 +455,9 @@ class InstallerWindow(Gtk.Window):
         
         # Steps
         self.sidebar_items = []
-        steps = [
-            ("Start", "system-run-symbolic"),
-            ("Welcome", "dialog-information-symbolic"),
-            ("Select Disk", "drive-harddisk-symbolic"),
-            ("User Setup", "system-users-symbolic"),
-            ("Summary", "emblem-documents-symbolic"),
-            ("Installation", "system-software-install-symbolic"),
-            ("Finish", "emblem-default-symbolic")
-        ]
-        
-        for i, (label, icon_name) in enumerate(steps):
+        self._sidebar_current = -1
+        
+        for i, (label, icon_name) in enumerate(SIDEBAR_STEPS):
             item_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
             item_box.get_style_context().add_class("sidebar-item")
             
@@ -279,70 +477,120 @@ class InstallerWindow(Gtk.Window):
         return sidebar
     
     def update_sidebar(self, current_page):
-        for i, item in enumerate(self.sidebar_items):
-            item.get_style_context().remove_class("sidebar-item-active")
-            item.get_style_context().remove_class("sidebar-item-completed")
-            
-            if i == current_page:
-                item.get_style_context().add_class("sidebar-item-active")
-            elif i < current_page:
-                item.get_style_context().add_class("sidebar-item-completed")
+        # Only restyle the items whose state changes since the last call
+        old = self._sidebar_current
+        if old == current_page:
+            return
+        
+        if old >= 0:
+            self.sidebar_items[old].get_style_context().remove_class("sidebar-item-active")
+        
+        if old < current_page:
+            for i in range(max(old, 0), current_page):
+                self.sidebar_items[i].get_style_context().add_class("sidebar-item-completed")
+        else:
+            for i in range(current_page + 1, old):
+                self.sidebar_items[i].get_style_context().remove_class("sidebar-item-completed")
+        
+        ctx = self.sidebar_items[current_page].get_style_context()
+        ctx.remove_class("sidebar-item-completed")
+        ctx.add_class("sidebar-item-active")
+        self._sidebar_current = current_page
+    
+    def start_image_search(self):
+        def search_thread():
+            self.find_qcow2_image()
+            GLib.idle_add(self.image_search_finished)
+        
+        thread = threading.Thread(target=search_thread)
+        thread.daemon = True
+        thread.start()
+    
+    def image_search_finished(self):
+        self.image_search_done = True
+        self.update_image_info()
+        return False
+    
+    def update_image_info(self):
+        if self.image_info is None:  # Welcome page not built yet
+            return
+        if self.qcow2_image:
+            self.image_info.set_markup(f"<b>Image:</b> {self._image_basename}")
+        else:
+            self.image_info.set_markup("<span color='red' weight='bold'>⚠ No installation image found!</span>")
     
     def find_qcow2_image(self):
-        search_paths = [
-            "/cdrom/images",
-            "/cdrom",
-            "/run/archiso/bootmnt/images",
-            "/run/archiso/bootmnt",
-            "/mnt/cdrom/images",
-            "/mnt/cdrom",
-            "/media/cdrom/images",
-            "/media/cdrom"
-        ]
+        # Search wherever installation media is actually mounted, then the usual spots
+        search_paths = []
+        try:
+            with open("/proc/mounts") as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) >= 3 and fields[2] in ("iso9660", "udf"):
+                        mount_point = unescape_mount_path(fields[1])
+                        search_paths.append(mount_point)
+        except OSError as e:
+            self.log(f"Cannot read /proc/mounts: {e}")
+        
+        for path in ["/cdrom/images", "/cdrom", "/run/archiso/bootmnt"]:
+            if path not in search_paths:
+                search_paths.append(path)
         
         self.log("Searching for QCOW2 images...")
         for path in search_paths:
             self.log(f"Checking path: {path}")
-            if os.path.isdir(path):
-                self.log(f"Directory exists: {path}")
-                try:
-                    # List directory contents for debugging
-                    try:
-                        contents = os.listdir(path)
-                        self.log(f"Contents of {path}: {contents}")
-                    except Exception as e:
-                        self.log(f"Cannot list {path}: {e}")
-                    
-                    result = subprocess.run(
-                        ["find", path, "-maxdepth", "3", "-name", "*.qcow2", "-type", "f"],
-                        capture_output=True, text=True
-                    )
-                    images = result.stdout.strip().split('\n')
-                    if images and images[0]:
-                        self.qcow2_image = images[0]
-                        self.log(f"Found QCOW2 image: {self.qcow2_image}")
-                        return
-                except Exception as e:
-                    self.log(f"Error searching {path}: {e}")
-            else:
-                self.log(f"Directory does not exist: {path}")
+            try:
+                # scandir reports a missing directory itself; no separate isdir stat
+                image = self.scan_for_qcow2(path, 3, log_contents=True)
+                if image:
+                    self.qcow2_image = image
+                    self._image_basename = os.path.basename(image)
+                    self.log(f"Found QCOW2 image: {self.qcow2_image}")
+                    return
+            except Exception as e:
+                self.log(f"Error searching {path}: {e}")
         
         self.log("WARNING: No QCOW2 image found!")
     
+    def scan_for_qcow2(self, root, max_depth, log_contents=False):
+        """Return the first *.qcow2 file under root, descending at most max_depth levels"""
+        if max_depth < 1:
+            return None
+        try:
+            with os.scandir(root) as it:
+                entries = list(it)
+        except (FileNotFoundError, NotADirectoryError):
+            if log_contents:
+                self.log(f"Directory does not exist: {root}")
+            return None
+        except OSError as e:
+            if log_contents:
+                self.log(f"Cannot list {root}: {e}")
+            return None
+        
+        if log_contents:
+            # List directory contents for debugging
+            self.log(f"Directory exists: {root}")
+            self.log(f"Contents of {root}: {[e.name for e in entries]}")
+        
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False) and entry.name.endswith(".qcow2"):
+                return entry.path
+            if entry.is_dir(follow_symlinks=False):
+                image = self.scan_for_qcow2(entry.path, max_depth - 1)
+                if image:
+                    return image
+        return None
+    
     def create_choice_page(self):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=30)
-        box.set_margin_top(50)
-        box.set_margin_bottom(50)
-        box.set_margin_start(50)
-        box.set_margin_end(50)
+        box.get_style_context().add_class("page-box-lg")
         box.set_halign(Gtk.Align.CENTER)
         box.set_valign(Gtk.Align.CENTER)
         
         # Load Nanas OS logo
-        logo_path = "/usr/share/nanas/nos-logo.png"
-        if os.path.exists(logo_path):
-            pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(logo_path, 512, 512, True)
-            icon = Gtk.Image.new_from_pixbuf(pixbuf)
+        if self._logo_ok:
+            icon = Gtk.Image.new_from_pixbuf(self._logo_512)
         else:
             icon = Gtk.Image.new_from_icon_name("distributor-logo", Gtk.IconSize.DIALOG)
             icon.set_pixel_size(512)
@@ -414,8 +662,7 @@ class InstallerWindow(Gtk.Window):
     
     def on_try_clicked(self, widget):
         self.log("User selected Try - exiting installer")
-        self.save_final_log()
-        Gtk.main_quit()
+        self.exit_installer()
     
     def on_install_clicked(self, widget):
         self.log("User selected Install - continuing to installation")
@@ -424,18 +671,13 @@ class InstallerWindow(Gtk.Window):
     
     def create_welcome_page(self):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=20)
-        box.set_margin_top(50)
-        box.set_margin_bottom(50)
-        box.set_margin_start(50)
-        box.set_margin_end(50)
+        box.get_style_context().add_class("page-box-lg")
         box.set_halign(Gtk.Align.CENTER)
         box.set_valign(Gtk.Align.CENTER)
         
         # Load Nanas OS logo
-        logo_path = "/usr/share/nanas/nos-logo.png"
-        if os.path.exists(logo_path):
-            pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(logo_path, 512, 512, True)
-            icon = Gtk.Image.new_from_pixbuf(pixbuf)
+        if self._logo_ok:
+            icon = Gtk.Image.new_from_pixbuf(self._logo_512)
         else:
             icon = Gtk.Image.new_from_icon_name("distributor-logo", Gtk.IconSize.DIALOG)
             icon.set_pixel_size(512)
@@ -455,23 +697,18 @@ class InstallerWindow(Gtk.Window):
         desc.set_justify(Gtk.Justification.CENTER)
         box.pack_start(desc, False, False, 0)
         
-        if self.qcow2_image:
-            image_info = Gtk.Label()
-            image_info.set_markup(f"<b>Image:</b> {os.path.basename(self.qcow2_image)}")
-            box.pack_start(image_info, False, False, 20)
-        else:
-            error = Gtk.Label()
-            error.set_markup("<span color='red' weight='bold'>⚠ No installation image found!</span>")
-            box.pack_start(error, False, False, 20)
+        # Filled in by update_image_info once the image search finishes
+        self.image_info = Gtk.Label()
+        self.image_info.set_markup("<i>Searching for installation image...</i>")
+        box.pack_start(self.image_info, False, False, 20)
+        if self.image_search_done:
+            self.update_image_info()
         
         self.content_stack.add_titled(box, "welcome", "Welcome")
     
     def create_disk_selection_page(self):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=20)
-        box.set_margin_top(30)
-        box.set_margin_bottom(30)
-        box.set_margin_start(40)
-        box.set_margin_end(40)
+        box.get_style_context().add_class("page-box-md")
         
         title = Gtk.Label()
         title.set_markup("<span size='large' weight='bold'>Select Installation Disk</span>")
@@ -491,7 +728,6 @@ class InstallerWindow(Gtk.Window):
         scrolled.set_vexpand(True)
         scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
         
-        self.disk_store = Gtk.ListStore(str, str, str, str)  # device, size, model, full_path
         self.disk_view = Gtk.TreeView(model=self.disk_store)
         self.disk_view.set_headers_visible(True)
         
@@ -515,32 +751,48 @@ class InstallerWindow(Gtk.Window):
         box.pack_start(refresh_btn, False, False, 0)
         
         self.content_stack.add_titled(box, "disk", "Disk Selection")
-        self.refresh_disks()
     
     def refresh_disks(self, widget=None):
+        # Rows still queued from an earlier refresh are dropped by append_disk_rows
+        self._disk_generation += 1
+        generation = self._disk_generation
         self.disk_store.clear()
-        try:
-            result = subprocess.run(
-                ["lsblk", "-dpno", "NAME,SIZE,MODEL"],
-                capture_output=True, text=True
-            )
-            for line in result.stdout.strip().split('\n'):
-                if line and not any(x in line for x in ['loop', 'sr']):
-                    parts = line.split(None, 2)
-                    if len(parts) >= 2:
-                        device = parts[0]
-                        size = parts[1] if len(parts) > 1 else "Unknown"
-                        model = parts[2] if len(parts) > 2 else "Unknown"
-                        self.disk_store.append([device, size, model, device])
-        except Exception as e:
-            print(f"Error listing disks: {e}")
+        
+        def refresh_thread():
+            rows = []
+            try:
+                result = subprocess.run(
+                    ["lsblk", "-Jdpno", "NAME,SIZE,MODEL,TYPE,RM"],
+                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+                )
+                data = json.loads(result.stdout)
+                for dev in data.get("blockdevices", []):
+                    if dev.get("type") in ("loop", "rom"):
+                        continue
+                    device = dev["name"]
+                    size = dev.get("size") or "Unknown"
+                    model = (dev.get("model") or "Unknown").strip()
+                    rows.append([device, size, model, device])
+            except Exception as e:
+                print(f"Error listing disks: {e}")
+            # Hand rows over in small batches so the main loop can paint in between
+            for i in range(0, len(rows), 8):
+                GLib.idle_add(self.append_disk_rows, generation, rows[i:i + 8])
+        
+        thread = threading.Thread(target=refresh_thread)
+        thread.daemon = True
+        thread.start()
+    
+    def append_disk_rows(self, generation, rows):
+        if generation != self._disk_generation:
+            return False
+        for row in rows:
+            self.disk_store.append(row)
+        return False
     
     def create_user_config_page(self):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=20)
-        box.set_margin_top(30)
-        box.set_margin_bottom(30)
-        box.set_margin_start(40)
-        box.set_margin_end(40)
+        box.get_style_context().add_class("page-box-md")
         
         title = Gtk.Label()
         title.set_markup("<span size='large' weight='bold'>User Configuration</span>")
@@ -560,6 +812,7 @@ class InstallerWindow(Gtk.Window):
         self.username_entry = Gtk.Entry()
         self.username_entry.set_placeholder_text("Enter username")
         self.username_entry.set_hexpand(True)
+        self.username_entry.connect("insert-text", self.filter_entry_text, self._USERNAME_CHARS_RE)
         grid.attach(self.username_entry, 1, 0, 1, 1)
         
         # Computer Name
@@ -569,6 +822,7 @@ class InstallerWindow(Gtk.Window):
         
         self.hostname_entry = Gtk.Entry()
         self.hostname_entry.set_placeholder_text("Enter computer name")
+        self.hostname_entry.connect("insert-text", self.filter_entry_text, self._HOSTNAME_CHARS_RE)
         grid.attach(self.hostname_entry, 1, 1, 1, 1)
         
         # Password
@@ -602,12 +856,14 @@ class InstallerWindow(Gtk.Window):
         
         self.content_stack.add_titled(box, "user", "User Setup")
     
+    def filter_entry_text(self, entry, new_text, new_text_length, position, pattern):
+        """Reject typed or pasted text containing characters the field does not allow"""
+        if not pattern.match(new_text):
+            entry.stop_emission_by_name("insert-text")
+    
     def create_summary_page(self):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=20)
-        box.set_margin_top(30)
-        box.set_margin_bottom(30)
-        box.set_margin_start(40)
-        box.set_margin_end(40)
+        box.get_style_context().add_class("page-box-md")
         
         title = Gtk.Label()
         title.set_markup("<span size='large' weight='bold'>Installation Summary</span>")
@@ -634,10 +890,7 @@ class InstallerWindow(Gtk.Window):
     
     def create_installation_page(self):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=20)
-        box.set_margin_top(50)
-        box.set_margin_bottom(50)
-        box.set_margin_start(50)
-        box.set_margin_end(50)
+        box.get_style_context().add_class("page-box-lg")
         box.set_valign(Gtk.Align.CENTER)
         
         title = Gtk.Label()
@@ -655,18 +908,13 @@ class InstallerWindow(Gtk.Window):
     
     def create_finish_page(self):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=20)
-        box.set_margin_top(50)
-        box.set_margin_bottom(50)
-        box.set_margin_start(50)
-        box.set_margin_end(50)
+        box.get_style_context().add_class("page-box-lg")
         box.set_halign(Gtk.Align.CENTER)
         box.set_valign(Gtk.Align.CENTER)
         
         # Success icon or logo
-        logo_path = "/usr/share/nanas/nos-logo.png"
-        if os.path.exists(logo_path):
-            pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(logo_path, 512, 512, True)
-            icon = Gtk.Image.new_from_pixbuf(pixbuf)
+        if self._logo_ok:
+            icon = Gtk.Image.new_from_pixbuf(self._logo_512)
         else:
             icon = Gtk.Image.new_from_icon_name("emblem-default", Gtk.IconSize.DIALOG)
             icon.set_pixel_size(512)
@@ -702,6 +950,7 @@ class InstallerWindow(Gtk.Window):
             self.current_page += 1
             
             if self.current_page == 4:  # Summary page
+                self.ensure_page(4)
                 self.update_summary()
             
             self.show_page(self.current_page)
@@ -713,12 +962,43 @@ class InstallerWindow(Gtk.Window):
                 GLib.timeout_add(500, self.perform_installation)
                 return
         elif self.current_page == 6:  # Finish page
-            # Reboot
-            subprocess.run(["reboot"])
+            self.reboot()
+    
+    def reboot(self):
+        """Ask logind to reboot, falling back to the reboot command"""
+        self.log("Rebooting system")
+        # The reboot may take the process down before the flusher runs again
+        self.flush_log()
+        try:
+            bus = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
+            bus.call_sync(
+                "org.freedesktop.login1",
+                "/org/freedesktop/login1",
+                "org.freedesktop.login1.Manager",
+                "Reboot",
+                GLib.Variant("(b)", (False,)),
+                None,
+                Gio.DBusCallFlags.NONE,
+                -1,
+                None
+            )
+        except Exception as e:
+            self.log(f"logind reboot failed, falling back to reboot command: {e}")
+            # Don't wait for it; let the main loop exit cleanly first
+            subprocess.Popen(["reboot"])
+        self.close_log()
+        Gtk.main_quit()
+    
+    def ensure_page(self, page):
+        if page not in self._built_pages:
+            self._page_builders[page]()
+            self._built_pages.add(page)
+            # Pages built after the window is shown need to be made visible
+            self.content_stack.get_child_by_name(self.PAGE_NAMES[page]).show_all()
     
     def show_page(self, page):
-        pages = ["choice", "welcome", "disk", "user", "summary", "install", "finish"]
-        self.content_stack.set_visible_child_name(pages[page])
+        self.ensure_page(page)
+        self.content_stack.set_visible_child_name(self.PAGE_NAMES[page])
         self.update_sidebar(page)
         
         # Update buttons - hide navigation buttons on choice page
@@ -745,7 +1025,15 @@ class InstallerWindow(Gtk.Window):
                 self.next_button.set_visible(False)
     
     def validate_current_page(self):
-        if self.current_page == 2:  # Disk selection
+        if self.current_page == 1:  # Welcome
+            if not self.image_search_done:
+                self.show_error("Still searching for the installation image, please wait")
+                return False
+            if not self.qcow2_image:
+                self.show_error("No installation image found. The system cannot be installed.")
+                return False
+        
+        elif self.current_page == 2:  # Disk selection
             selection = self.disk_view.get_selection()
             model, treeiter = selection.get_selected()
             if treeiter is None:
@@ -760,6 +1048,8 @@ class InstallerWindow(Gtk.Window):
                 dialog.destroy()
                 return False
             self.selected_disk = model[treeiter][3]
+            # The kernel inserts "p" before the partition number when the disk name ends in a digit
+            self._part_prefix = "p" if self.selected_disk[-1].isdigit() else ""
         
         elif self.current_page == 3:  # User config
             self.username = self.username_entry.get_text().strip()
@@ -771,30 +1061,46 @@ class InstallerWindow(Gtk.Window):
                 self.show_error("Please enter a username")
                 return False
             
+            if not self._USERNAME_RE.match(self.username):
+                self.show_error(
+                    "Invalid username: use up to 32 lowercase letters, digits, '_' or '-', "
+                    "starting with a letter or '_'"
+                )
+                return False
+            
             if not self.hostname:
                 self.show_error("Please enter a computer name")
                 return False
             
+            if not self._HOSTNAME_RE.match(self.hostname):
+                self.show_error("Invalid computer name: use up to 63 letters, digits or '-'")
+                return False
+            
             if not self.password:
                 self.show_error("Please enter a password")
                 return False
             
+            # Passwords go to chpasswd one "user:password" per line
+            if "\n" in self.password or "\r" in self.password:
+                self.show_error("Password cannot contain line breaks")
+                return False
+            
             if self.password != password_confirm:
                 self.show_error("Passwords do not match")
                 return False
+            
+            self._bullets = "\u2022" * len(self.password)
         
         return True
     
     def update_summary(self):
-        summary = f"""<b>Installation Target:</b> {self.selected_disk}
-
-<b>User Configuration:</b>
-  • Username: {self.username}
-  • Computer Name: {self.hostname}
-  • Password: {'•' * len(self.password)}
-
-<b>Image:</b> {os.path.basename(self.qcow2_image) if self.qcow2_image else 'N/A'}
-"""
+        summary = SUMMARY_TEMPLATE.format(
+            disk=self.selected_disk,
+            username=self.username,
+            hostname=self.hostname,
+            bullets=self._bullets,
+            image=self._image_basename or 'N/A'
+        )
         self.summary_text.set_markup(summary)
     
     def show_error(self, message):
@@ -812,34 +1118,34 @@ class InstallerWindow(Gtk.Window):
         def install_thread():
             try:
                 # Unmount partitions
-                GLib.idle_add(self.update_install_status, "Unmounting partitions...", 0.1)
-                subprocess.run(f"for part in $(lsblk -ln -o NAME {self.selected_disk} 2>/dev/null | grep -v '^$(basename {self.selected_disk})$' || true); do umount -f /dev/$part 2>/dev/null || true; done", shell=True)
+                self.post_status("Unmounting partitions...", 0.1)
+                self.unmount_disk_partitions()
                 
                 # Verify image
-                GLib.idle_add(self.update_install_status, "Verifying image...", 0.2)
-                subprocess.run(["qemu-img", "info", self.qcow2_image], check=True, capture_output=True)
+                self.post_status("Verifying image...", 0.2)
+                subprocess.run(["qemu-img", "info", self.qcow2_image], check=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                
+                # Discard old contents so the SSD starts from free blocks
+                self.post_status("Preparing disk...", 0.25)
+                self.discard_disk()
                 
                 # Flash image
-                GLib.idle_add(self.update_install_status, "Flashing image to disk...", 0.3)
-                subprocess.run(
-                    ["qemu-img", "convert", "-f", "qcow2", "-O", "raw", "-p", self.qcow2_image, self.selected_disk],
-                    check=True
-                )
+                self.post_status("Flashing image to disk...", 0.3)
+                self.flash_image(self.build_convert_cmd(), 0.3, 0.95)
                 
                 # Sync
-                GLib.idle_add(self.update_install_status, "Syncing filesystem...", 0.95)
-                subprocess.run(["sync"])
+                self.post_status("Syncing filesystem...", 0.95)
+                self.fsync_device(self.selected_disk)
                 
                 # Reload partition table
-                subprocess.run(["partprobe", self.selected_disk], capture_output=True)
-                import time
-                time.sleep(2)
+                self.reread_partition_table()
                 
                 # Configure the installed system
-                GLib.idle_add(self.update_install_status, "Configuring system...", 0.96)
+                self.post_status("Configuring system...", 0.96)
                 self.configure_installed_system()
                 
-                GLib.idle_add(self.update_install_status, "Installation complete!", 1.0)
+                self.post_status("Installation complete!", 1.0)
                 GLib.idle_add(self.installation_complete)
                 
             except Exception as e:
@@ -850,50 +1156,160 @@ class InstallerWindow(Gtk.Window):
         thread.start()
         return False  # Don't repeat timeout
     
+    def unmount_disk_partitions(self):
+        """Unmount every mounted partition of the selected disk"""
+        disk = os.path.basename(self.selected_disk)
+        sys_dir = f"/sys/class/block/{disk}"
+        try:
+            partitions = {
+                name for name in os.listdir(sys_dir)
+                if os.path.exists(os.path.join(sys_dir, name, "partition"))
+            }
+        except OSError as e:
+            self.log(f"Cannot list partitions of {self.selected_disk}: {e}")
+            return
+        
+        mount_points = []
+        with open("/proc/self/mountinfo") as f:
+            for line in f:
+                fields = line.split()
+                # Optional fields end at "-", followed by fstype and mount source
+                sep = fields.index("-")
+                source = fields[sep + 2]
+                if source.startswith("/dev/") and os.path.basename(source) in partitions:
+                    mount_points.append(unescape_mount_path(fields[4]))
+        
+        # Deepest mount points first so nested mounts don't keep parents busy
+        for mount_point in sorted(mount_points, key=len, reverse=True):
+            self.log(f"Unmounting {mount_point}")
+            subprocess.run(["umount", "-f", mount_point], stderr=subprocess.DEVNULL, check=False)
+    
+    def fsync_device(self, device):
+        """Flush only the given block device rather than every filesystem on the host"""
+        fd = os.open(device, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    
+    def reread_partition_table(self):
+        """Re-read the target's partition table and wait for udev to create the nodes"""
+        try:
+            fd = os.open(self.selected_disk, os.O_RDONLY)
+            try:
+                fcntl.ioctl(fd, self.BLKRRPART)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            self.log(f"BLKRRPART failed ({e}), falling back to partprobe")
+            subprocess.run(["partprobe", self.selected_disk],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        subprocess.run(["udevadm", "settle", "--timeout=10"], check=False)
+    
+    def discard_disk(self):
+        """TRIM the whole target disk if it supports discard"""
+        disk = os.path.basename(self.selected_disk)
+        try:
+            with open(f"/sys/block/{disk}/queue/discard_max_bytes") as f:
+                if int(f.read()) == 0:
+                    return
+        except (OSError, ValueError):
+            return
+        # -f: the user already confirmed the erase and the partitions are unmounted;
+        # without it blkdiscard refuses disks carrying a partition table or filesystem
+        result = subprocess.run(["blkdiscard", "-f", self.selected_disk], stdin=subprocess.DEVNULL,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            self.log(f"blkdiscard failed, continuing: {result.stderr.strip()}")
+    
+    def qemu_img_supports(self, option):
+        """Check whether qemu-img's convert synopsis lists the given option"""
+        if self._qemu_img_help is None:
+            try:
+                result = subprocess.run(["qemu-img", "--help"], stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, text=True)
+                self._qemu_img_help = result.stdout
+            except Exception as e:
+                self.log(f"Cannot query qemu-img options: {e}")
+                self._qemu_img_help = ""
+        return f"[{option}" in self._qemu_img_help
+    
+    def supports_o_direct(self, path):
+        """Check whether path can be opened with O_DIRECT (iso9660 cannot)"""
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_DIRECT)
+        except OSError:
+            return False
+        os.close(fd)
+        return True
+    
+    def build_convert_cmd(self):
+        # -m/-W keep several out-of-order writes in flight to fill the device queue
+        cmd = ["qemu-img", "convert", "-f", "qcow2", "-O", "raw", "-p", "-m", "16", "-W"]
+        
+        # Writeback on the target is safe because the install syncs right after
+        # flashing; the source is read exactly once, so bypass the page cache there
+        if self.qemu_img_supports("-t"):
+            cmd += ["-t", "writeback"]
+        if self.qemu_img_supports("-T") and self.supports_o_direct(self.qcow2_image):
+            cmd += ["-T", "none"]
+        
+        # Copy offloading; qemu-img falls back to a normal copy if the kernel can't do it.
+        # Zero detection stays at its 4k default: an explicit -S would rule out -C
+        if self.qemu_img_supports("-C"):
+            cmd.append("-C")
+        
+        cmd += [self.qcow2_image, self.selected_disk]
+        self.log(f"Flash command: {' '.join(cmd)}")
+        return cmd
+    
+    def flash_image(self, cmd, start, end):
+        """Run qemu-img convert, mapping its -p progress onto [start, end] of the progress bar"""
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+        last_percent = -1
+        # Universal newlines turn qemu-img's carriage-return updates into lines
+        for line in process.stdout:
+            match = self._PROGRESS_RE.search(line)
+            if not match:
+                continue
+            percent = int(float(match.group(1)))
+            # Post at most one main-loop update per whole percent
+            if percent != last_percent:
+                last_percent = percent
+                self.post_status(
+                    f"Flashing image to disk... {percent}%",
+                    start + (end - start) * percent / 100
+                )
+        process.stdout.close()
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd)
+    
     def configure_installed_system(self):
         """Configure username, hostname, and password on the installed system"""
         mount_point = "/mnt/nanas-install"
         
         try:
+            # Keep the install mounts out of the host namespace so systemd and
+            # udisks don't rescan mountinfo for each of them
+            self.enter_private_mount_namespace()
+            
             # Create mount point
             os.makedirs(mount_point, exist_ok=True)
             
             # Find and mount the root partition (usually partition 2)
-            result = subprocess.run(
-                ["lsblk", "-ln", "-o", "NAME,FSTYPE,MOUNTPOINT", self.selected_disk],
-                capture_output=True, text=True
-            )
-            
-            root_partition = None
-            for line in result.stdout.strip().split('\n'):
-                parts = line.split()
-                if len(parts) >= 2 and parts[1] in ['ext4', 'xfs', 'btrfs']:
-                    # Get the full device path
-                    part_name = parts[0]
-                    if not part_name.startswith('/dev/'):
-                        if 'nvme' in self.selected_disk or 'mmcblk' in self.selected_disk:
-                            root_partition = f"/dev/{part_name}"
-                        else:
-                            root_partition = f"/dev/{part_name}"
-                    else:
-                        root_partition = part_name
-                    break
+            root_partition = self.find_root_partition()
             
             if not root_partition:
                 self.log("Could not find root partition, trying default...")
                 # Try default partition naming
-                if 'nvme' in self.selected_disk or 'mmcblk' in self.selected_disk:
-                    root_partition = f"{self.selected_disk}p2"
-                else:
-                    root_partition = f"{self.selected_disk}2"
+                root_partition = f"{self.selected_disk}{self._part_prefix}2"
             
             self.log(f"Mounting root partition: {root_partition}")
             subprocess.run(["mount", root_partition, mount_point], check=True)
             
             # Set hostname
             self.log(f"Setting hostname to: {self.hostname}")
-            with open(f"{mount_point}/etc/hostname", "w") as f:
-                f.write(f"{self.hostname}\n")
+            self.write_bytes(f"{mount_point}/etc/hostname", f"{self.hostname}\n".encode())
             
             # Update /etc/hosts
             hosts_content = f"""127.0.0.1	localhost
@@ -903,39 +1319,32 @@ class InstallerWindow(Gtk.Window):
 ff02::1		ip6-allnodes
 ff02::2		ip6-allrouters
 """
-            with open(f"{mount_point}/etc/hosts", "w") as f:
-                f.write(hosts_content)
+            self.write_bytes(f"{mount_point}/etc/hosts", hosts_content.encode())
             
             # Create user and set password using chroot
             self.log(f"Creating user: {self.username}")
             
-            # Mount necessary filesystems for chroot
-            subprocess.run(["mount", "-t", "proc", "proc", f"{mount_point}/proc"], check=False)
-            subprocess.run(["mount", "-t", "sysfs", "sys", f"{mount_point}/sys"], check=False)
-            subprocess.run(["mount", "-o", "bind", "/dev", f"{mount_point}/dev"], check=False)
-            subprocess.run(["mount", "-t", "devpts", "devpts", f"{mount_point}/dev/pts"], check=False)
+            # Mount what the account tools need inside the chroot: /proc and a
+            # private /dev with only the basic character devices (no host /dev
+            # bind, devpts or sysfs)
+            self.mount_fs("proc", f"{mount_point}/proc", "proc")
+            # Never create device nodes in the installed system's real /dev
+            if self.mount_fs("tmpfs", f"{mount_point}/dev", "tmpfs", data="mode=0755,size=64k"):
+                self.populate_minimal_dev(f"{mount_point}/dev")
             
-            # Create user with home directory
-            subprocess.run(
-                ["chroot", mount_point, "useradd", "-m", "-s", "/bin/bash", self.username],
-                check=True
+            # Create the user, add it to sudo and set the user and root passwords
+            # in one chroot; the username is passed as $1 and the credentials
+            # for both accounts reach a single chpasswd on stdin
+            script = (
+                'set -e\n'
+                'useradd -m -s /bin/bash "$1"\n'
+                'usermod -aG sudo "$1" || true\n'  # sudo group might not exist
+                'chpasswd\n'
             )
-            
-            # Set user password
             subprocess.run(
-                ["chroot", mount_point, "bash", "-c", f"echo '{self.username}:{self.password}' | chpasswd"],
-                check=True
-            )
-            
-            # Add user to sudo group
-            subprocess.run(
-                ["chroot", mount_point, "usermod", "-aG", "sudo", self.username],
-                check=False  # sudo group might not exist
-            )
-            
-            # Set root password to the same
-            subprocess.run(
-                ["chroot", mount_point, "bash", "-c", f"echo 'root:{self.password}' | chpasswd"],
+                ["chroot", mount_point, "bash", "-c", script, "bash", self.username],
+                input=f"{self.username}:{self.password}\nroot:{self.password}\n",
+                text=True,
                 check=True
             )
             
@@ -943,18 +1352,129 @@ ff02::2		ip6-allrouters
             
         except Exception as e:
             self.log(f"Error configuring system: {e}")
-            import traceback
             self.log(traceback.format_exc())
         
         finally:
             # Unmount everything
+            # A lazy detach of the root takes /proc and /dev below it along in one syscall
             self.log("Unmounting filesystems...")
-            subprocess.run(["umount", "-f", f"{mount_point}/dev/pts"], check=False)
-            subprocess.run(["umount", "-f", f"{mount_point}/dev"], check=False)
-            subprocess.run(["umount", "-f", f"{mount_point}/sys"], check=False)
-            subprocess.run(["umount", "-f", f"{mount_point}/proc"], check=False)
-            subprocess.run(["umount", "-f", mount_point], check=False)
-            subprocess.run(["sync"])
+            if libc.umount2(mount_point.encode(), self.MNT_DETACH) != 0:
+                err = ctypes.get_errno()
+                if err != errno.EINVAL:  # EINVAL: nothing was mounted
+                    self.log(f"Failed to unmount {mount_point}: {os.strerror(err)}")
+            os.sync()
+    
+    def enter_private_mount_namespace(self):
+        """Move the calling (worker) thread into its own mount namespace, slaved to the host's"""
+        # unshare(CLONE_NEWNS) applies to this thread only, and to the chroot and
+        # mount processes it spawns; the GTK main thread keeps the host view
+        if libc.unshare(self.CLONE_NEWNS) != 0:
+            self.log(f"unshare(CLONE_NEWNS) failed: {os.strerror(ctypes.get_errno())}")
+            return False
+        # Stop our mounts propagating back through shared peer groups
+        if libc.mount(None, b"/", None, self.MS_REC | self.MS_SLAVE, None) != 0:
+            self.log(f"Failed to make / a slave mount: {os.strerror(ctypes.get_errno())}")
+            return False
+        return True
+    
+    def write_bytes(self, path, data):
+        """Replace a small file's contents with one unbuffered write"""
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+    
+    def mount_fs(self, source, target, fstype, flags=0, data=None):
+        """mount(2) directly; failures are logged, not raised"""
+        ret = libc.mount(source.encode(), target.encode(), fstype.encode(), flags,
+                         data.encode() if data else None)
+        if ret != 0:
+            err = ctypes.get_errno()
+            self.log(f"Failed to mount {source} on {target}: {os.strerror(err)}")
+            return False
+        return True
+    
+    def populate_minimal_dev(self, dev_dir):
+        """Create the character devices chroot'ed tools expect in dev_dir"""
+        nodes = {
+            "null": (1, 3),
+            "zero": (1, 5),
+            "full": (1, 7),
+            "random": (1, 8),
+            "urandom": (1, 9),
+            "tty": (5, 0),
+        }
+        for name, (major, minor) in nodes.items():
+            path = os.path.join(dev_dir, name)
+            try:
+                os.mknod(path, stat.S_IFCHR | 0o666, os.makedev(major, minor))
+                os.chmod(path, 0o666)  # mknod honours the umask
+            except FileExistsError:
+                pass
+            except OSError as e:
+                self.log(f"Cannot create /dev/{name}: {e}")
+    
+    def find_root_partition(self):
+        """Return the first ext4/xfs/btrfs partition of the selected disk, or None"""
+        disk = os.path.basename(self.selected_disk)
+        sys_dir = f"/sys/class/block/{disk}"
+        partitions = []
+        try:
+            for name in os.listdir(sys_dir):
+                try:
+                    with open(os.path.join(sys_dir, name, "partition")) as f:
+                        partitions.append((int(f.read()), name))
+                except (OSError, ValueError):
+                    continue  # Not a partition
+        except OSError as e:
+            self.log(f"Cannot list partitions of {self.selected_disk}: {e}")
+            return None
+        
+        for _, name in sorted(partitions):
+            device = f"/dev/{name}"
+            fstype = self.probe_fstype(device)
+            self.log(f"Partition {device}: {fstype or 'unknown'}")
+            if fstype in ("ext4", "xfs", "btrfs"):
+                return device
+        return None
+    
+    def probe_fstype(self, device):
+        """Identify ext4, xfs or btrfs from the superblock magic without blkid"""
+        try:
+            with open(device, "rb") as f:
+                head = f.read(0x10048)
+        except OSError as e:
+            self.log(f"Cannot read {device}: {e}")
+            return None
+        if head[0:4] == b"XFSB":
+            return "xfs"
+        if head[0x10040:0x10048] == b"_BHRfS_M":
+            return "btrfs"
+        if head[0x438:0x43A] == b"\x53\xef":
+            # Extents, 64bit or flex_bg in s_feature_incompat mean ext4;
+            # otherwise has_journal in s_feature_compat tells ext3 from ext2
+            compat = int.from_bytes(head[0x45C:0x460], "little")
+            incompat = int.from_bytes(head[0x460:0x464], "little")
+            if incompat & 0x2C0:
+                return "ext4"
+            return "ext3" if compat & 0x4 else "ext2"
+        return None
+    
+    def post_status(self, status, progress):
+        """Publish install status from a worker; bursts collapse into one idle callback"""
+        with self._status_lock:
+            self._pending_status = (status, progress)
+            if self._status_scheduled:
+                return
+            self._status_scheduled = True
+        GLib.idle_add(self.flush_status)
+    
+    def flush_status(self):
+        with self._status_lock:
+            status, progress = self._pending_status
+            self._status_scheduled = False
+        return self.update_install_status(status, progress)
     
     def update_install_status(self, status, progress):
         self.install_status.set_text(status)
@@ -985,6 +1505,28 @@ ff02::2		ip6-allrouters
         self.next_button.set_sensitive(True)
         return False
 
+def wait_for_cdrom(max_wait):
+    """Wait until /cdrom is usable; return the seconds waited, or None on timeout"""
+    def cdrom_ready():
+        return os.path.ismount("/cdrom") or os.path.exists("/cdrom/images")
+    
+    if cdrom_ready():
+        return 0.0
+    
+    start = time.monotonic()
+    # The kernel flags /proc/self/mounts with POLLPRI whenever the mount table changes
+    with open("/proc/self/mounts") as mounts:
+        poller = select.poll()
+        poller.register(mounts, select.POLLPRI | select.POLLERR)
+        while True:
+            remaining = max_wait - (time.monotonic() - start)
+            if remaining <= 0:
+                return None
+            # Wake at least every 5s in case /cdrom/images shows up without a mount
+            poller.poll(min(remaining, 5) * 1000)
+            if cdrom_ready():
+                return time.monotonic() - start
+
 if __name__ == "__main__":
     # Check if installer has already been run this session
     flag_file = "/tmp/.nanas-installer-run"
@@ -1004,13 +1546,9 @@ if __name__ == "__main__":
     # Wait for /cdrom to be mounted (up to 30 seconds)
     print("[INSTALLER] Waiting for /cdrom to be mounted...")
     max_wait = 30
-    for i in range(max_wait):
-        if os.path.ismount("/cdrom") or os.path.exists("/cdrom/images"):
-            print(f"[INSTALLER] /cdrom is ready after {i} seconds")
-            break
-        print(f"[INSTALLER] Waiting for /cdrom mount... ({i+1}/{max_wait})")
-        import time
-        time.sleep(1)
+    waited = wait_for_cdrom(max_wait)
+    if waited is not None:
+        print(f"[INSTALLER] /cdrom is ready after {waited:.1f} seconds")
     else:
         print("[INSTALLER] WARNING: /cdrom not mounted after 30 seconds, continuing anyway...")
     